@@ -4,7 +4,7 @@
 # BART is under an open-source, reproducible-research license (see LICENSE).
 
 import sys, os, re, shutil, time, subprocess
-import argparse, ConfigParser
+import argparse, configparser
 import numpy as np
 
 # Directory of BART.py file:
@@ -222,7 +222,7 @@ def main():
     mu.error("Configuration file: '{:s}' not found.".format(cfile))
 
   # Read values from configuration file:
-  config = ConfigParser.SafeConfigParser()
+  config = configparser.ConfigParser()
   config.optionxform = str  # This one enable Uppercase in arguments
   config.read([cfile])
   defaults = dict(config.items("MCMC"))
@@ -250,7 +250,7 @@ def main():
   mu.msg(1, "Output folder: '{:s}'".format(date_dir), indent=2)
   try:
     os.mkdir(date_dir)
-  except OSError, e:
+  except OSError as e:
     if e.errno == 17: # Allow overwritting while we debug
       pass
     else:
@@ -321,9 +321,9 @@ def main():
     temp = ipt.initialPT2(date_dir, PTinit, press_file, PTtype, tep_name)
     # Choose a pressure-temperature profile
     mu.msg(1, "\nChoose temperature and pressure profile:", indent=2)
-    raw_input("  open Initial PT profile figure and\n" 
-              "  press enter to continue or quit and choose other initial "
-              "PT parameters.")
+    input("  open Initial PT profile figure and\n" 
+          "  press enter to continue or quit and choose other initial "
+          "PT parameters.")
     preatm_file = date_dir + preatm_file
     mat.make_preatm(tep_name, press_file, abun_file, in_elem, out_spec,
                   preatm_file, temp)
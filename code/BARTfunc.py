@@ -3,10 +3,11 @@
 # Copyright (C) 2015-2016 University of Central Florida. All rights reserved.
 # BART is under an open-source, reproducible-research license (see LICENSE).
 
-import sys, os
-import argparse, ConfigParser
+import sys, os, hashlib
+import argparse, configparser
 import numpy as np
 import scipy.constants as sc
+import scipy.sparse    as ss
 from mpi4py import MPI
 
 import makeatm   as mat
@@ -23,10 +24,15 @@ sys.path.append(BARTdir + "/../modules/transit/transit/python")
 import transit_module as trm
 
 
-def main(comm):
+# Version tag of the band-integration matrix cache files.  Bump it whenever
+# wine.readkurucz, wine.readfilter, wine.resample, or wine.bandmatrix
+# change, so that old cache files are not re-used:
+BANDMATRIX_VERSION = b"bandmatrix-v1"
+
+
+def parseargs():
   """
-  This is a hacked version of MC3's func.py.
-  This function directly call's the modeling function for the BART project.
+  Parse the command-line and configuration-file arguments of func.
   """
   # Parse arguments:
   cparser = argparse.ArgumentParser(description=__doc__, add_help=False,
@@ -40,7 +46,7 @@ def main(comm):
   # Get parameters from configuration file:
   cfile = args.config_file
   if cfile:
-    config = ConfigParser.SafeConfigParser()
+    config = configparser.ConfigParser()
     config.optionxform = str
     config.read([cfile])
     defaults = dict(config.items("MCMC"))
@@ -99,16 +105,151 @@ def main(comm):
                      help="Solution geometry [default: %(default)s]",
                      dest="solution", type=str,       default="None",
                      choices=('transit', 'eclipse'))
+  group.add_argument("--loc_dir",                     action="store",
+                     help="Output directory [default: %(default)s]",
+                     dest="loc_dir",  type=str,       default=".")
+  group.add_argument("--cache_dir",                   action="store",
+                     help="Directory to cache the band-integration matrix "
+                          "[default: loc_dir]",
+                     dest="cache_dir", type=str,      default=None)
 
   parser.set_defaults(**defaults)
   args2, unknown = parser.parse_known_args(remaining_argv)
+  return args2
+
+
+def bcasterror(world, message):
+  """
+  Broadcast an error message from rank 0 to all func processes, and if
+  there is one (not None), make every process exit together.
+
+  Parameters:
+  -----------
+  world: MPI communicator
+     Communicator among the func processes.
+  message: String
+     Error message (only meaningful in rank 0), None if no error.
+  """
+  message = world.bcast(message, root=0)
+  if message is not None:
+    if world.Get_rank() == 0:
+      mu.exit(message=message)
+    mu.exit()
+
+
+def getbandmatrix(ffile, kurucz, tstar, gstar, specwn, solution, cachedir):
+  """
+  Read the stellar model and the filters, and compute the band-integration
+  matrix of the filters over the specwn sampling.  The result is cached
+  into a 'bandmatrix_<md5>.npz' file in cachedir, and re-used by later
+  calls with the same inputs.  Cache files can be safely deleted.
+
+  Parameters:
+  -----------
+  ffile: List of strings
+     Filter file names.
+  kurucz: String
+     Stellar Kurucz file name.
+  tstar: Float
+     Stellar temperature in K.
+  gstar: Float
+     Log10 of the stellar surface gravity (g in cgs units).
+  specwn: 1D ndarray
+     Wavenumber sampling of the spectrum (in cm-1).
+  solution: String
+     Solution geometry ('transit' or 'eclipse').
+  cachedir: String
+     Directory where to store the cache file.
+
+  Returns:
+  --------
+  bandmat: 2D sparse CSR matrix
+     Band-integration matrix (see wine.bandmatrix).
+  """
+  # Cache key from the inputs (and modification times of the input files),
+  # and the cache format version:
+  key = hashlib.md5()
+  key.update(BANDMATRIX_VERSION)
+  for fname in [kurucz] + list(ffile):
+    key.update("{:s} {:.6f}\n".format(fname,
+                                       os.path.getmtime(fname)).encode())
+  key.update("{:.6f} {:.6f} {:s}\n".format(tstar, gstar, solution).encode())
+  key.update(np.ascontiguousarray(specwn, np.double).tobytes())
+  cachefile = os.path.join(cachedir,
+                           "bandmatrix_{:s}.npz".format(key.hexdigest()))
+
+  if os.path.isfile(cachefile):
+    with np.load(cachefile) as cache:
+      bandmat = ss.csr_matrix((cache["data"], cache["indices"],
+                               cache["indptr"]), shape=tuple(cache["shape"]))
+    return bandmat
+
+  # FINDME: Separate filter/stellar interpolation?
+  # Get stellar model:
+  starfl, starwn, tmodel, gmodel = w.readkurucz(kurucz, tstar, gstar)
+  # Read and resample the filters:
+  nifilter  = [] # Normalized interpolated filter
+  istarfl   = [] # interpolated stellar flux
+  wnindices = [] # wavenumber indices used in interpolation
+  for i in range(len(ffile)):
+    # Read filter:
+    filtwaven, filttransm = w.readfilter(ffile[i])
+    # Check that filter boundaries lie within the spectrum wn range:
+    if filtwaven[0] < specwn[0] or filtwaven[-1] > specwn[-1]:
+      raise ValueError("Wavenumber array ({:.2f} - {:.2f} cm-1) does not "
+                "cover the filter[{:d}] wavenumber range ({:.2f} - {:.2f} "
+                "cm-1).".format(specwn[0], specwn[-1], i, filtwaven[0],
+                                                          filtwaven[-1]))
+
+    # Resample filter and stellar spectrum:
+    nifilt, strfl, wnind = w.resample(specwn, filtwaven, filttransm,
+                                              starwn,    starfl)
+    nifilter.append(nifilt)
+    istarfl.append(strfl)
+    wnindices.append(wnind)
+
+  # Band-integration matrix (eclipse integrates the planet-to-star ratio):
+  if solution == "eclipse":
+    bandmat = w.bandmatrix(specwn, nifilter, wnindices, istarfl)
+  else:
+    bandmat = w.bandmatrix(specwn, nifilter, wnindices)
+
+  # Cache to file (write to a temporary file first, so that an interrupted
+  # or concurrent run never leaves a truncated cache file):
+  if not os.path.isdir(cachedir):
+    os.makedirs(cachedir)
+  tmpfile = "{:s}.{:d}.tmp".format(cachefile, os.getpid())
+  with open(tmpfile, "wb") as f:
+    np.savez_compressed(f, data=bandmat.data, indices=bandmat.indices,
+                        indptr=bandmat.indptr, shape=bandmat.shape)
+  os.replace(tmpfile, cachefile)
+  return bandmat
+
 
+def main(comm):
+  """
+  This is a hacked version of MC3's func.py.
+  This function directly call's the modeling function for the BART project.
+  """
   # Quiet all threads except rank 0:
   rank = comm.Get_rank()
   verb = rank == 0
 
+  # Communicator among the func processes:
+  world = MPI.COMM_WORLD
+
+  # Parse arguments (only rank 0, then broadcast to the other processes):
+  args2, errmsg = None, None
+  if rank == 0:
+    try:
+      args2 = parseargs()
+    except (Exception, SystemExit) as e:
+      errmsg = "Cannot parse the func arguments ({}).".format(e)
+  bcasterror(world, errmsg)
+  args2 = world.bcast(args2, root=0)
+
   # Get (Broadcast) the number of parameters and iterations from MPI:
-  array1 = np.zeros(2, np.int)
+  array1 = np.zeros(2, int)
   mu.comm_bcast(comm, array1)
   npars, niter = array1
 
@@ -123,18 +264,24 @@ def main(comm):
   Tmax     = args2.Tmax
   solution = args2.solution  # Solution type
 
-  # Extract necessary values from the TEP file:
-  tep = rd.File(tepfile)
-  # Stellar temperature in K:
-  tstar = float(tep.getvalue('Ts')[0])
-  # Stellar radius (in meters):
-  rstar = float(tep.getvalue('Rs')[0]) * c.Rsun
-  # Semi-major axis (in meters):
-  sma   = float(tep.getvalue( 'a')[0]) * sc.au
-  # Planetary radius (in meters):
-  rplanet = float(tep.getvalue('Rp')[0]) * c.Rjup
-  # Planetary mass (in kg):
-  mplanet = float(tep.getvalue('Mp')[0]) * c.Mjup
+  # Extract necessary values from the TEP file (only rank 0, then
+  # broadcast to the other processes):
+  tepvals = np.zeros(6, dtype='d')
+  if rank == 0:
+    try:
+      tep = rd.File(tepfile)
+      tepvals[:] = [
+        float(tep.getvalue('Ts')[0]),           # Stellar temperature in K
+        float(tep.getvalue('Rs')[0]) * c.Rsun,  # Stellar radius in m
+        float(tep.getvalue( 'a')[0]) * sc.au,   # Semi-major axis in m
+        float(tep.getvalue('Rp')[0]) * c.Rjup,  # Planetary radius in m
+        float(tep.getvalue('Mp')[0]) * c.Mjup,  # Planetary mass in kg
+        float(tep.getvalue('loggstar')[0])]     # Log10(stellar gravity)
+    except Exception as e:
+      errmsg = "Cannot read the TEP file '{}' ({}).".format(tepfile, e)
+  bcasterror(world, errmsg)
+  world.Bcast([tepvals, MPI.DOUBLE], root=0)
+  tstar, rstar, sma, rplanet, mplanet, gstar = tepvals
 
   # Number of fitting parameters:
   nfree   = len(params)                 # Total number of free parameters
@@ -144,6 +291,9 @@ def main(comm):
 
   # Read atmospheric file to get data arrays:
   species, pressure, temp, abundances = mat.readatm(atmfile)
+  species = np.asarray(species)
+  # Species index lookup table:
+  ispecies = dict((spec, i) for i, spec in enumerate(species))
   # Reverse pressure order (for PT to work):
   pressure = pressure[::-1]
   nlayers  = len(pressure)   # Number of atmospheric layers
@@ -151,17 +301,20 @@ def main(comm):
   mu.msg(verb, "There are {:d} layers and {:d} species.".format(nlayers,
                                                                 nspecies))
   # Find index for Hydrogen and Helium:
-  species = np.asarray(species)
-  iH2     = np.where(species=="H2")[0]
-  iHe     = np.where(species=="He")[0]
+  iH2     = ispecies["H2"]
+  iHe     = ispecies["He"]
   # Get H2/He abundance ratio:
-  ratio = (abundances[:,iH2] / abundances[:,iHe]).squeeze()
+  ratio = abundances[:,iH2] / abundances[:,iHe]
+  # H2 and He fractions of the non-metal abundance in each layer:
+  fH2 = ratio / (1.0 + ratio)
+  fHe = 1.0   / (1.0 + ratio)
   # Find indices for the metals:
   imetals = np.where((species != "He") & (species != "H2"))[0]
+  # Metals mask (to sum the metal abundances as a dot product):
+  metalmask = np.zeros(nspecies, dtype='d')
+  metalmask[imetals] = 1.0
   # Index of molecular abundances being modified:
-  imol = np.zeros(nmolfit, dtype='i')
-  for i in np.arange(nmolfit):
-    imol[i] = np.where(np.asarray(species) == molfit[i])[0]
+  imol = np.array([ispecies[mol] for mol in molfit], dtype='i')
 
   # Pressure-Temperature profile:
   PTargs = [PTtype]
@@ -177,11 +330,23 @@ def main(comm):
   # This are sub-sections of profiles, containing just the temperature and
   # the abundance profiles, respectively:
   tprofile  = profiles[0, :]
+  # Temperature profile in the (reversed) order of pressure:
+  rtprofile = tprofile[::-1]
   aprofiles = profiles[1:,:]
+  # Flattened view of profiles to pass to transit (it shares memory with
+  # profiles, so it is updated along with tprofile and aprofiles):
+  profiles_flat = profiles.reshape(-1)
 
   # Store abundance profiles:
-  for i in np.arange(nspecies):
+  for i in range(nspecies):
     aprofiles[i] = abundances[:, i]
+  # Contiguous (nmolfit, nlayers) copy of the fitted-molecule abundances:
+  abund_cols = abundances[:, imol].T.copy()
+  # Abundance scaling factors and scaled fitted-molecule abundances:
+  scales      = np.empty(nmolfit,            dtype='d')
+  molprofiles = np.empty((nmolfit, nlayers), dtype='d')
+  # Non-metals abundance per layer:
+  q = np.zeros(nlayers, dtype='d')
 
   # :::::::  Spawn transit code  :::::::::::::::::::::::::::::::::::::
   # # transit configuration file:
@@ -206,40 +371,35 @@ def main(comm):
   ffile    = args2.filter    # Filter files
   kurucz   = args2.kurucz    # Kurucz file
 
-  # Log10(stellar gravity)
-  gstar = float(tep.getvalue('loggstar')[0])
   # Planet-to-star radius ratio:
   rprs  = rplanet / rstar
 
   nfilters = len(ffile)  # Number of filters:
 
-  # FINDME: Separate filter/stellar interpolation?
-  # Get stellar model:
-  starfl, starwn, tmodel, gmodel = w.readkurucz(kurucz, tstar, gstar)
-  # Read and resample the filters:
-  nifilter  = [] # Normalized interpolated filter
-  istarfl   = [] # interpolated stellar flux
-  wnindices = [] # wavenumber indices used in interpolation
-  for i in np.arange(nfilters):
-    # Read filter:
-    filtwaven, filttransm = w.readfilter(ffile[i])
-    # Check that filter boundaries lie within the spectrum wn range:
-    if filtwaven[0] < specwn[0] or filtwaven[-1] > specwn[-1]:
-      mu.exit(message="Wavenumber array ({:.2f} - {:.2f} cm-1) does not "
-              "cover the filter[{:d}] wavenumber range ({:.2f} - {:.2f} "
-              "cm-1).".format(specwn[0], specwn[-1], i, filtwaven[0],
-                                                        filtwaven[-1]))
-
-    # Resample filter and stellar spectrum:
-    nifilt, strfl, wnind = w.resample(specwn, filtwaven, filttransm,
-                                              starwn,    starfl)
-    nifilter.append(nifilt)
-    istarfl.append(strfl)
-    wnindices.append(wnind)
+  # Band-integration matrix (only rank 0, then broadcast to the other
+  # processes):
+  cachedir = args2.cache_dir
+  if cachedir is None:
+    cachedir = args2.loc_dir
+  bandmat = None
+  if rank == 0:
+    try:
+      bandmat = getbandmatrix(ffile, kurucz, tstar, gstar, specwn, solution,
+                              cachedir)
+    except Exception as e:
+      errmsg = "Cannot compute the band-integration matrix ({}).".format(e)
+  bcasterror(world, errmsg)
+  bandmat = world.bcast(bandmat, root=0)
+  # Fold the planet-to-star area ratio into the eclipse band integration:
+  if solution == "eclipse":
+    rprs2 = rprs*rprs
+    bandmat.data *= rprs2
 
   # Allocate arrays for receiving and sending data to master:
   spectrum = np.zeros(nwave,    dtype='d')
   bandflux = np.zeros(nfilters, dtype='d')
+  # Reply for out-of-bounds temperature profiles:
+  oob_reply = np.full(nfilters, -1.0, dtype='d')
 
   # Allocate array to receive parameters from MPI:
   params = np.zeros(npars, np.double)
@@ -258,26 +418,32 @@ def main(comm):
 
     # Input converter calculate the profiles:
     try:
-      tprofile[:] = pt.PT_generator(pressure, params[0:nPT], PTargs)[::-1]
+      pt.PT_generator(pressure, params[0:nPT], PTargs, out=rtprofile)
     except ValueError:
       mu.msg(verb, 'Input parameters give non-physical profile.')
       # FINDME: what to do here?
 
     # If the temperature goes out of bounds:
-    if np.any(tprofile < Tmin) or np.any(tprofile > Tmax):
+    if tprofile.min() < Tmin or tprofile.max() > Tmax:
       #print("Out of bounds")
-      mu.comm_gather(comm, -np.ones(nfilters), MPI.DOUBLE)
+      mu.comm_gather(comm, oob_reply, MPI.DOUBLE)
       continue
 
-    # Scale abundance profiles:
-    for i in np.arange(nmolfit):
-      m = imol[i]
-      # Use variable as the log10:
-      aprofiles[m] = abundances[:, m] * 10.0**params[nPT+nradfit+i]
+    # Scale abundance profiles (use variables as the log10):
+    np.multiply(params[nPT+nradfit:nPT+nradfit+nmolfit], np.log(10.0),
+                out=scales)
+    np.exp(scales, out=scales)
+    np.multiply(abund_cols, scales[:,np.newaxis], out=molprofiles)
+    aprofiles[imol] = molprofiles
     # Update H2, He abundances so sum(abundances) = 1.0 in each layer:
-    q = 1.0 - np.sum(aprofiles[imetals], axis=0)
-    aprofiles[iH2] = ratio * q / (1.0 + ratio)
-    aprofiles[iHe] =         q / (1.0 + ratio)
+    # (Clear the H2, He rows first, so that non-finite values from a
+    # previous iteration do not leak into q through the 0-weighted rows):
+    aprofiles[iH2] = 0.0
+    aprofiles[iHe] = 0.0
+    np.dot(metalmask, aprofiles, out=q)
+    np.subtract(1.0, q, out=q)
+    np.multiply(fH2, q, out=aprofiles[iH2])
+    np.multiply(fHe, q, out=aprofiles[iHe])
 
     # Set the 'surface' level:
     if solution == "transit":
@@ -286,18 +452,11 @@ def main(comm):
     if rank == 1:
       print("Iteration: {:05}".format(niter))
     # Let transit calculate the model spectrum:
-    spectrum = trm.run_transit(profiles.flatten(), nwave)
+    spectrum = trm.run_transit(profiles_flat, nwave)
 
     # Output converter band-integrate the spectrum:
     # Calculate the band-integrated intensity per filter:
-    for i in np.arange(nfilters):
-      if   solution == "eclipse":
-        fluxrat = (spectrum[wnindices[i]]/istarfl[i]) * rprs*rprs
-        bandflux[i] = w.bandintegrate(fluxrat, specwn,
-                                      nifilter[i], wnindices[i])
-      elif solution == "transit":
-        bandflux[i] = w.bandintegrate(spectrum[wnindices[i]], specwn,
-                                      nifilter[i], wnindices[i])
+    bandflux[:] = bandmat.dot(spectrum)
 
     # Send resutls back to MCMC:
     #mu.msg(verb, "OCON FLAG 95: Flux band integrated ({})".format(bandflux))
@@ -119,15 +119,15 @@ def planet_Teff(tepfile):
 
      # Get stellar temperature in K
      stellarT = tep.getvalue('Ts')
-     Tstar    = np.float(stellarT[0])
+     Tstar    = float(stellarT[0])
 
      # Get stellar radius in units of Rsun
      stellarR = tep.getvalue('Rs')
-     Rstar    = np.float(stellarR[0])
+     Rstar    = float(stellarR[0])
 
      # Get semimajor axis in AU
      semimajor = tep.getvalue('a')
-     a         = np.float(semimajor[0])
+     a         = float(semimajor[0])
 
      # Sun radius in meters:
      # Source: http://nssdc.gsfc.nasa.gov/planetary/factsheet/sunfact.html
@@ -146,7 +146,7 @@ def planet_Teff(tepfile):
 
 
 # generates PT profile for inverted atmosphere
-def PT_Inversion(p, a1, a2, p1, p2, p3, T3):
+def PT_Inversion(p, a1, a2, p1, p2, p3, T3, verb=False, out=None):
      '''
      Calculates PT profile for inversion case based on Equation (2) from
      Madhusudhan & Seager 2009.
@@ -173,6 +173,10 @@ def PT_Inversion(p, a1, a2, p1, p2, p3, T3):
          Pressure boundary between Layers 2 and 3 (in bars).
      T3: float
          Temperature in the Layer 3.
+     verb: Boolean
+         If True, print diagnostic progress.
+     out: 1D float ndarray
+         If not None, write the smoothed temperatures into this array.
       
      Returns
      -------
@@ -305,7 +309,8 @@ def PT_Inversion(p, a1, a2, p1, p2, p3, T3):
 
      # Set top of the atmosphere to p0 to have easy understandable equations:
      p0 = np.amin(p)
-     print(p0)
+     if verb:
+       print(p0)
 
      # Temperature at point 2
      # Calculated from boundary condition between layer 2 and 3
@@ -320,7 +325,8 @@ def PT_Inversion(p, a1, a2, p1, p2, p3, T3):
 
      # Error message when temperatures ar point 1, 2 or 3 are < 0
      if T0<0 or T1<0 or T2<0 or T3<0:
-          print 'T0, T1, T2 and T3 temperatures are: ', T0, T1, T2, T3
+          if verb:
+            print('T0, T1, T2 and T3 temperatures are: ', T0, T1, T2, T3)
           raise ValueError('Input parameters give non-physical profile. Try again.')
 
      # Defining arrays of pressures for every part of the PT profile
@@ -331,9 +337,10 @@ def PT_Inversion(p, a1, a2, p1, p2, p3, T3):
 
      # Sanity check for total number of levels
      check = len(p_l1) + len(p_l2_pos) + len(p_l2_neg) + len(p_l3)
-     print  'Total number of levels in p: ', len(p)
-     print  '\nLevels per levels in inversion case (l1, l2_pos, l2_neg, l3) are respectively: ', len(p_l1), len(p_l2_pos), len(p_l2_neg), len(p_l3)
-     print  'Checking total number of levels in inversion case: ', check
+     if verb:
+       print('Total number of levels in p: ', len(p))
+       print('\nLevels per levels in inversion case (l1, l2_pos, l2_neg, l3) are respectively: ', len(p_l1), len(p_l2_pos), len(p_l2_neg), len(p_l3))
+       print('Checking total number of levels in inversion case: ', check)
 
      # The following set of equations derived using Equation 2
      # Madhusudhan and Seager 2009
@@ -358,13 +365,13 @@ def PT_Inversion(p, a1, a2, p1, p2, p3, T3):
 
      # Smoothing with Gaussian_filter1d
      sigma = 4
-     T_smooth = gaussian_filter1d(T_conc, sigma, mode='nearest')
+     T_smooth = gaussian_filter1d(T_conc, sigma, mode='nearest', output=out)
     
      return PT_Inver, T_smooth
 
 
 # generated PT profile for non-inverted atmopshere
-def PT_NoInversion(p, a1, a2, p1, p3, T3, verb=False):
+def PT_NoInversion(p, a1, a2, p1, p3, T3, verb=False, out=None):
      '''
      Calculates PT profile for non-inversion case based on Equation (2) from
      Madhusudhan & Seager 2009.
@@ -393,6 +400,8 @@ def PT_NoInversion(p, a1, a2, p1, p3, T3, verb=False):
          Temperature in the Layer 3.
      verb: Boolean
          If True, print some info to screen.
+     out: 1D float ndarray
+         If not None, write the smoothed temperatures into this array.
    
      Returns
      -------
@@ -561,12 +570,12 @@ def PT_NoInversion(p, a1, a2, p1, p3, T3, verb=False):
 
      # Smoothed PT profile:
      sigma = 4
-     T_smooth = gaussian_filter1d(T_conc, sigma, mode='nearest')
+     T_smooth = gaussian_filter1d(T_conc, sigma, mode='nearest', output=out)
 
      return PT_NoInver, T_smooth
 
 
-def PT_line(pressure, params, R_star, T_star, T_int, sma, grav):
+def PT_line(pressure, params, R_star, T_star, T_int, sma, grav, out=None):
   '''
   Generats a PT profile based on input free parameters and pressure array.
   If no inputs are provided, it will run in demo mode, using free
@@ -595,6 +604,8 @@ def PT_line(pressure, params, R_star, T_star, T_int, sma, grav):
      Semi-major axis (in meters).
   grav:   Float
      Planetary surface gravity (at 1 bar) in cm/second^2.
+  out:    1D float ndarray
+     If not None, write the temperatures into this array.
 
   Returns
   -------
@@ -665,9 +676,9 @@ def PT_line(pressure, params, R_star, T_star, T_int, sma, grav):
   xi2 = xi(gamma2, tau)
 
   # Temperature profile (Eq. 13 of Line et al. 2013):
-  temperature = (0.75 * (T_int**4 * (2.0/3.0 + tau) +
-                         T_irr**4 * (1-alpha) * xi1 +
-                         T_irr**4 * alpha     * xi2 ) )**0.25
+  temperature = np.power(0.75 * (T_int**4 * (2.0/3.0 + tau) +
+                                 T_irr**4 * ((1-alpha) * xi1 + alpha * xi2)),
+                         0.25, out=out)
 
   return temperature
 
@@ -687,11 +698,12 @@ def xi(gamma, tau):
   ---------------------
   2014-12-10  patricio  Initial implemetation.
   """
-  return (2.0/3) * (1 + (1/gamma) * (1 + (0.5*gamma*tau-1)*np.exp(-gamma*tau)) +
-                    gamma*(1 - 0.5*tau**2) * sp.expn(2, gamma*tau)             )
+  gtau = gamma*tau
+  return (2.0/3) * (1 + (1/gamma) * (1 + (0.5*gtau-1)*np.exp(-gtau)) +
+                    gamma*(1 - 0.5*tau**2) * sp.expn(2, gtau)           )
 
 
-def PT_generator(p, free_params, args):
+def PT_generator(p, free_params, args, out=None):
   '''
   Wrapper to generate an inverted or non-inverted temperature and pressure
   profile.
@@ -706,6 +718,10 @@ def PT_generator(p, free_params, args):
   args: List
      Boolean that determines inversion (True) or non-inversion (False)
      temperature profile case.
+  out: 1D float ndarray
+     If not None, the PT kernels write the temperature array directly
+     into out (e.g., a view into a preallocated array), which is also
+     the returned array.
 
   Returns
   -------
@@ -721,12 +737,12 @@ def PT_generator(p, free_params, args):
   '''
   # args[0] indicate the type of temperature profile:
   if   args[0] == "line":
-    Temp = PT_line(p, free_params, *args[1:])
+    Temp = PT_line(p, free_params, *args[1:], out=out)
   elif args[0] == "madhu":
     if   len(free_params) == 5: # Non-inversion layer
-      PT, Temp = PT_NoInversion(p, *free_params)
+      PT, Temp = PT_NoInversion(p, *free_params, out=out)
     elif len(free_params) == 6: # With inversion layer
-      PT, Temp = PT_Inversion(p,   *free_params)
+      PT, Temp = PT_Inversion(p,   *free_params, out=out)
   else:
     print("Unknown T profile type: '{:s}'".format(args[0]))
     # FINDME: throw error and stop.
@@ -97,16 +97,16 @@ def get_starData(tepfile):
     tep = rd.File(tepfile)
 
     # Get star mass in Mjup:
-    Tstar = np.float(tep.getvalue('Ts')[0])
+    Tstar = float(tep.getvalue('Ts')[0])
 
     # Get star radius in MKS units:
-    Rstar = np.float(tep.getvalue('Rs')[0]) * c.Rsun
+    Rstar = float(tep.getvalue('Rs')[0]) * c.Rsun
 
     # Get semi major axis in meters:
-    sma = np.float(tep.getvalue('a')[0]) * sc.au
+    sma = float(tep.getvalue('a')[0]) * sc.au
 
     # Get star loggstar:
-    gstar = np.float(tep.getvalue('loggstar')[0])
+    gstar = float(tep.getvalue('loggstar')[0])
 
     return Rstar, Tstar, sma, gstar
 
@@ -91,7 +91,7 @@ def readTauDat(file, nlayers):
     wns = np.zeros(len(wn_lines))
     for i in np.arange(len(tau_lines)):
         tau[i] = tau_lines[i].split()
-        wns[i] = np.float(wn_lines[i].split()[1])
+        wns[i] = float(wn_lines[i].split()[1])
 
     # Transpose the order of tau array
     tau = tau.T
@@ -156,7 +156,7 @@ def filter_cf(filters, nlayers, wns, cf):
 		wn, response = w.readfilter(filters[i])
 
         # Find where filters starts and ends
-		wn_filt = np.asarray(filter(lambda x: x>min(wn) and x<max(wn), wns))
+		wn_filt = np.asarray([x for x in wns if x>min(wn) and x<max(wn)])
 		start_filt, stop_filt = np.where(wns==min(wn_filt))[0][0], np.where(wns==max(wn_filt))[0][0]
 
 		# Interpolate filter response functions
@@ -173,7 +173,7 @@ def filter_cf(filters, nlayers, wns, cf):
 
         # Integrate cf across bandpass (filter)
 		for k in np.arange(nlayers):
-			filt_cf[i, k] = np.trapz(cf_filt_resp[k, :])
+			filt_cf[i, k] = w.trapz(cf_filt_resp[k, :])
 
 		# Normalize to 1
 		filt_cf_norm[i] = (filt_cf[i] - min(filt_cf[i])) / (max(filt_cf[i]) - min(filt_cf[i]))
@@ -167,9 +167,9 @@ def get_g(tepfile):
   tep = rd.File(tepfile)
 
   # Get planet mass in kg:
-  Mplanet = np.float(tep.getvalue('Mp')[0]) * c.Mjup
+  Mplanet = float(tep.getvalue('Mp')[0]) * c.Mjup
   # Get planet radius in m:
-  Rplanet = np.float(tep.getvalue('Rp')[0]) * c.Rjup
+  Rplanet = float(tep.getvalue('Rp')[0]) * c.Rjup
 
   # Calculate the planet surface gravity in m/s^2:
   g = sc.G * Mplanet / (Rplanet**2)
@@ -368,8 +368,8 @@ def stoich(specie):
     # Allocate string length and array of booleans to indicate if characters
     #          are capitals or digits
     chars   = len(specie)
-    iscaps  = np.empty(chars, dtype=np.bool)
-    isdigit = np.empty(chars, dtype=np.bool)
+    iscaps  = np.empty(chars, dtype=bool)
+    isdigit = np.empty(chars, dtype=bool)
     
     # Check each character in string to fill in boolean arrays for capitals
     #       or digits; 
@@ -395,17 +395,17 @@ def stoich(specie):
         
         # Check if character is a digit, if so, make this the element's weight
         if isdigit[i] == True:
-            weight = np.int(specie[i])
+            weight = int(specie[i])
         
         # Check if element name ends (next capital is reached) 
         #       and if no weight (count) is found, set it to 1
         if (isdigit[i] == False and                \
-           (iscaps[i+1:i+2] == True or i == chars-1)):
+           (i == chars-1 or iscaps[i+1])):
             weight = 1
         
         # If next element is found or if end of species name is reached 
         #    (end of string), stop tracking
-        if (iscaps[i+1:i+2] == True or i == chars-1): 
+        if (i == chars-1 or iscaps[i+1]): 
             endele = True
         
         # End of element has been reached, so output weights of element 
@@ -413,7 +413,7 @@ def stoich(specie):
         if endele == True:
 
             # Create array containing only the elements used in this run 
-            if stoich_info == [[]]:
+            if np.size(stoich_info) == 0:
                 stoich_info = np.append(stoich_info, [[ele, weight]], axis=1)
             else:
                 stoich_info = np.append(stoich_info, [[ele, weight]], axis=0)
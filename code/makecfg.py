@@ -2,7 +2,7 @@
 # BART is under an open-source, reproducible-research license (see LICENSE).
 
 import os, sys
-import argparse, ConfigParser
+import argparse, configparser
 import numpy as np
 import scipy.constants as sc
 
@@ -47,7 +47,7 @@ def makeTransit(cfile, tepfile, shareOpacity):
   # Name of the configuration-file section:
   section = "MCMC"
   # Read BART configuration file:
-  Bconfig = ConfigParser.SafeConfigParser()
+  Bconfig = configparser.ConfigParser()
   Bconfig.read([cfile])
 
   # Keyword names of the arguments in the BART configuration file:
@@ -110,7 +110,7 @@ def makeMCMC(cfile, MCMC_cfile, logfile):
   # Name of the configuration-file section:
   section = "MCMC"
   # Open input BART configuration file:
-  Bconfig = ConfigParser.SafeConfigParser()
+  Bconfig = configparser.ConfigParser()
   Bconfig.optionxform = str
   Bconfig.read([cfile])
   # Keyword names of the arguments in the BART configuration file:
@@ -118,7 +118,7 @@ def makeMCMC(cfile, MCMC_cfile, logfile):
 
   # Known arguments that may have a path:
   input_args = ["tep_name", "kurucz", "molfile", "filter", "linedb",
-                "csfile", "loc_dir"]
+                "csfile", "loc_dir", "cache_dir"]
   output_args = ["tconfig",    "atmfile",   "opacityfile", "press_file",
                  "abun_basic", "abun_file", "preatm_file", "outspec",
                  "savemodel", "logfile"]
@@ -171,11 +171,11 @@ def makeTEA(cfile, TEAdir):
      Default TEA directory.
   """
   # Open New ConfigParser:
-  config = ConfigParser.SafeConfigParser()
+  config = configparser.ConfigParser()
   config.add_section('TEA')
 
   # Open BART ConfigParser:
-  Bconfig = ConfigParser.SafeConfigParser()
+  Bconfig = configparser.ConfigParser()
   Bconfig.read([cfile])
 
   # List of known TEA arguments:
@@ -103,7 +103,7 @@ class File:
     '''
     try:
       id = np.where(self.params == par)[0]
-      value = self.values[id]
+      value = self.values[id[0]]
       return value[0] if value.size == 1 else value
     except:
       return np.nan
@@ -5,6 +5,11 @@ import numpy as np
 import kurucz_inten      as ki
 import scipy.constants   as sc
 import scipy.interpolate as si
+import scipy.sparse      as ss
+
+# Trapezoidal integration (np.trapz was renamed np.trapezoid in numpy 2.0,
+# and later removed):
+trapz = getattr(np, "trapezoid", None) or np.trapz
 
 """
 WINE: Waveband INtegrated Emission module
@@ -168,7 +173,7 @@ def resample(specwn, filterwn, filtertr, starwn, starfl):
   # Evaluate over the spectrum wavenumber array:
   ifilter = finterp(specwn[wnindices])
   # Normalize to integrate to 1.0:
-  nifilter = ifilter/np.trapz(ifilter, specwn[wnindices])
+  nifilter = ifilter/trapz(ifilter, specwn[wnindices])
 
   # Return the normalized interpolated filter and the indices:
   return nifilter, istarfl, wnindices
@@ -196,4 +201,51 @@ def bandintegrate(spectrum, specwn, nifilter, wnindices):
   # Flux ratio:
   # fratio = Fplanet / Fstar * rprs**2.0
 
-  return np.trapz(spectrum*nifilter, specwn[wnindices])
+  return trapz(spectrum*nifilter, specwn[wnindices])
+
+
+def bandmatrix(specwn, nifilter, wnindices, istarfl=None):
+  """
+  Build a sparse matrix that band-integrates a spectrum over a set of
+  filters, such that bandflux = bandmat.dot(spectrum) is equivalent to
+  calling bandintegrate for each filter.
+
+  Parameters:
+  -----------
+  specwn: 1D ndarray
+     Wavenumber of spectrum in cm^-1
+  nifilter: List of 1D ndarrays
+     The normalized interpolated filter transmission curves.
+  wnindices: List of 1D ndarrays
+     Indices of specwn where each filter is evaluated.
+  istarfl: List of 1D ndarrays
+     If not None, the interpolated stellar flux for each filter, by which
+     the spectrum is divided before integration.
+
+  Returns:
+  --------
+  bandmat: 2D sparse CSR matrix
+     Band-integration matrix of shape (nfilters, len(specwn)).
+
+  Modification History:
+  ---------------------
+  2026-10-14  agent     Initial implementation.
+  """
+  # Pack the filters into contiguous arrays, with the offsets of each
+  # filter (the CSR row pointers):
+  offsets = np.cumsum([0] + [len(nifilt) for nifilt in nifilter])
+  wnind   = np.concatenate([np.ravel(wni) for wni in wnindices])
+  wn      = specwn[wnind]
+
+  # Trapezoidal-rule integration weights (no steps across filters):
+  dwn = np.ediff1d(wn)
+  dwn[offsets[1:-1]-1] = 0.0
+  weights = np.zeros(len(wn), np.double)
+  weights[:-1] += 0.5*dwn
+  weights[1: ] += 0.5*dwn
+  weights *= np.concatenate(nifilter)
+  if istarfl is not None:
+    weights /= np.concatenate(istarfl)
+
+  return ss.csr_matrix((weights, wnind, offsets),
+                       shape=(len(nifilter), len(specwn)))
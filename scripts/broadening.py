@@ -1,7 +1,7 @@
 import sys, os
 import numpy as np
 import scipy.constants as sc
-import ConfigParser
+import configparser
 
 scriptsdir = os.path.dirname(os.path.realpath(__file__))
 sys.path.append(scriptsdir + "/../code")
@@ -19,7 +19,7 @@ def get_widths(cfile):
   """
 
   # Read config:
-  config = ConfigParser.SafeConfigParser()
+  config = configparser.ConfigParser()
   config.optionxform = str  # This one enable Uppercase in arguments
   config.read([cfile])
   defaults = dict(config.items("MCMC"))
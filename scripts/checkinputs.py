@@ -0,0 +1,34 @@
+# Smoke check: read the bundled TEP and Kurucz input files with the BART
+# readers, and check that the values come out as expected.
+#
+# Usage (from any folder):
+#   python scripts/checkinputs.py
+
+import sys, os
+import numpy as np
+
+BARTdir = os.path.dirname(os.path.realpath(__file__)) + "/../"
+sys.path.append(BARTdir + "code/")
+import reader as rd
+import wine   as w
+
+
+# TEP file:
+tep = rd.File(BARTdir + "inputs/tep/HD209458b.tep")
+tepvals = {"Ts":6075.0, "Rs":1.145, "a":0.047, "Rp":1.350, "Mp":0.66,
+           "loggstar":4.37}
+for par in tepvals:
+  value = float(tep.getvalue(par)[0])
+  assert value == tepvals[par], "TEP '{:s}': {} != {}".format(par, value,
+                                                             tepvals[par])
+# A missing parameter returns NaN:
+assert np.isnan(tep.getvalue("NotAParameter"))
+
+# Kurucz file:
+starfl, starwn, tmodel, gmodel = w.readkurucz(
+                        BARTdir + "inputs/kurucz/fp00k2odfnew.pck", 6000., 4.4)
+assert tmodel == 6000.0
+assert len(starfl) == len(starwn) > 0
+assert np.all(np.isfinite(starfl)) and np.all(starfl >= 0)
+
+print("Input readers OK.")